@@ -1,12 +1,127 @@
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from lxml import etree, html
 from selenium import webdriver
-from typing import List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from team_id_dict import TEAM_ID
+from tenacity import RetryCallState, retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+import asyncio
+import glob
+import gzip
+import hashlib
+import httpx
 import pickle
 import re
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import os.path
-import numpy as np
+import pathlib
+import time
+import zlib
+
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"}
+
+# Directory with downloaded pages
+CACHE_DIR = pathlib.Path(".cache")
+
+# Wait time between download attempts (1s, 2s, 4s, ... up to 30s, plus up to 1s of random jitter)
+BACKOFF = wait_exponential_jitter(initial=1, max=30)
+
+# Longest wait requested by Retry-After header that is respected (download slot is held while waiting)
+MAX_RETRY_AFTER = 60
+
+# Patterns used to clean minutes (integer) and ratings (float) of a player
+NOT_DIGIT = re.compile(r"[^0-9]")
+NOT_FLOAT = re.compile(r"[^0-9.]")
+
+# Schema of the players dataset
+PLAYERS_SCHEMA = pa.schema([("Name", pa.string()), ("Club", pa.string()), ("Nationality", pa.string()), ("Date", pa.string()),
+                            ("Home", pa.string()), ("Away", pa.string()), ("Result", pa.string()), ("Minutes", pa.int64()),
+                            ("Ratings", pa.float64()), ("Yellow", pa.int64()), ("Red", pa.int64()), ("Goals", pa.int64()),
+                            ("Assists", pa.int64()), ("MOM", pa.int64())])
+
+
+def hasClass(classes: str) -> str:
+    """Build xpath condition on the class attribute that matches the same elements as BeautifulSoup class filter.
+
+    Args:
+        classes (str): Single class name (element has this class) or full class attribute value (element has exactly these classes)
+
+    Returns:
+        str: Xpath condition
+    """
+    if " " in classes:
+        return f'normalize-space(@class)="{classes}"'
+    return f'contains(concat(" ", normalize-space(@class), " "), " {classes} ")'
+
+
+# Xpath expressions used to extract player statistics (compiled once, return plain strings)
+PLAYER_INFO = f'//div[{hasClass("col12-lg-10 col12-m-10 col12-s-9 col12-xs-8")}]'
+MATCHES_TABLE = '//div[@id="player-matches-table"]'
+PLAYER_TEAM = etree.XPath(f'{PLAYER_INFO}//a[{hasClass("team-link")}]/text()[1]', smart_strings=False)
+PLAYER_NATIONALITY = etree.XPath(f'{PLAYER_INFO}//span[{hasClass("iconize iconize-icon-left")}]/text()[1]', smart_strings=False)
+MATCH_DATES = etree.XPath(f'{MATCHES_TABLE}//div[{hasClass("col12-lg-1 col12-m-2 col12-s-0 col12-xs-0 divtable-data date-long")}]/descendant::div[1]/text()[1]', smart_strings=False)
+HOME_TEAMS = etree.XPath(f'{MATCHES_TABLE}//div[{hasClass("home-team")}]/descendant::a[1]/text()[1]', smart_strings=False)
+AWAY_TEAMS = etree.XPath(f'{MATCHES_TABLE}//div[{hasClass("away-team")}]/descendant::a[1]/text()[1]', smart_strings=False)
+MATCH_RESULTS = etree.XPath(f'{MATCHES_TABLE}//div[{hasClass("player-match-result")}]/descendant::a[1]/text()[1]', smart_strings=False)
+MATCH_MINUTES = etree.XPath(f'{MATCHES_TABLE}//div[@title="Minutes played in this match"]/text()[1]', smart_strings=False)
+MATCH_RATINGS = etree.XPath(f'{MATCHES_TABLE}//div[@title="Rating in this match"]/text()[1]', smart_strings=False)
+MATCH_INCIDENTS = etree.XPath(f'{MATCHES_TABLE}//div[{hasClass("col12-lg-3 col12-m-2 col12-s-3 col12-xs-3 divtable-data match-icons")}]')
+INCIDENT_TITLES = etree.XPath(f'.//span[{hasClass("incident-wrapper")}]/descendant::span[1]/@title', smart_strings=False)
+
+# Fragments of html present only on complete player pages (player information and match table)
+PLAYER_PAGE_SENTINELS = ("col12-lg-10 col12-m-10 col12-s-9 col12-xs-8", 'id="player-matches-table"')
+
+
+def classFilter(class_name: str) -> Callable[[Optional[str]], bool]:
+    """Build BeautifulSoup class filter matching tags that have class_name among their classes.
+
+    Unlike a class string it matches the same tags in find_all and in SoupStrainer (which gets the whole attribute value),
+    and it avoids comparing long class attribute values.
+
+    Args:
+        class_name (str): One of the tag classes (unique enough to identify the tag)
+
+    Returns:
+        Callable[[Optional[str]], bool]: Filter that can be passed as the class attribute value
+    """
+    def matches(value: Optional[str]) -> bool:
+        return value is not None and class_name in value.split()
+    return matches
+
+
+# Class filters used to extract clubs and squads from uefa webpage
+CLUBS_TABLE = classFilter("teams-overview_teams-wrapper")
+SQUAD_TABLE = classFilter("squad--team-wrap")
+SQUAD_POSITION = classFilter("pk-table--body")
+SQUAD_PLAYER = classFilter("row--squadlist")
+
+
+def createDriver() -> webdriver.Chrome:
+    """Initialize headless Chrome webdriver that can be reused for many pages.
+
+    Returns:
+        webdriver.Chrome: Webdriver (use as a context manager so it is closed at the end)
+    """
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+
+    # Do not download assets that are not needed to read the page structure (images, stylesheets and fonts)
+    options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    driver = webdriver.Chrome(options=options)
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": ["*.css*", "*.woff*", "*.ttf*", "*.otf*"]})
+    except Exception:
+        # Browser is already running, but the caller never gets the driver to close it
+        driver.quit()
+        raise
+    return driver
 
 
 def getClubs(url: str="https://www.uefa.com/uefachampionsleague/clubs/") -> Tuple[List[str], List[str]]:
@@ -19,14 +134,13 @@ def getClubs(url: str="https://www.uefa.com/uefachampionsleague/clubs/") -> Tupl
         Tuple[List[str], List[str]]: List of club names and list of links
     """
     # Initialize webdriver and get content
-    driver = webdriver.Chrome()
-    driver.get(url)
-    page_content = driver.page_source
-    driver.quit()
+    with createDriver() as driver:
+        driver.get(url)
+        page_content = driver.page_source
 
     # Extract information
-    soup = BeautifulSoup(page_content, features="html.parser")
-    clubs_table = soup.select("div.teams-overview_teams-wrapper")[0]
+    soup = BeautifulSoup(page_content, features="lxml", parse_only=SoupStrainer("div", {"class": CLUBS_TABLE}))
+    clubs_table = soup.find("div", {"class": CLUBS_TABLE})
     clubs = clubs_table.find_all("a", {"class" : "team-wrap"})
     names = [club.get("title") for club in clubs]
     links = [club.get("href") for club in clubs] # /uefachampionsleague/clubs/50031--young-boys/
@@ -43,120 +157,337 @@ def getWhoScoredLinks(names: List[str], url: str="https://www.whoscored.com/Team
         path (str, optional): Path where the results will be written to. Defaults to "scraping/player_links.pickle".
     """
     all_links = []
-    for name in names:
-        # Translate team name to id
-        id = TEAM_ID[name]
+    with createDriver() as driver:
+        for name in names:
+            # Translate team name to id
+            id = TEAM_ID[name]
 
-        # Initialize webdriver and get content for a club
-        driver = webdriver.Chrome()
-        driver.get(f"{url}{id}/")
-        page_content = driver.page_source
-        driver.quit()
+            # Get content for a club
+            driver.get(f"{url}{id}/")
+            page_content = driver.page_source
 
-        # Extract links to every player of the club
-        soup = BeautifulSoup(page_content, features="html.parser")
-        stat_table = soup.find("div", {"id": "statistics-table-summary"})
-        players = stat_table.find_all("a", {"class" : "player-link"})
-        links = [player.get("href") for player in players]
-        all_links.append(links)
+            # Extract links to every player of the club
+            soup = BeautifulSoup(page_content, features="lxml", parse_only=SoupStrainer("div", {"id": "statistics-table-summary"}))
+            stat_table = soup.find("div", {"id": "statistics-table-summary"})
+            players = stat_table.find_all("a", {"class" : "player-link"})
+            links = [player.get("href") for player in players]
+            all_links.append(links)
         
     # Save results as a pickle (list of lists where every inner list holds players from one club)
     with open(path, "wb") as f:
         pickle.dump(all_links, f)
         
 
-def getPlayersData(players_path: str="scraping/player_links.pickle", data_path: str="data/raw.csv") -> None:
+def cachePath(url: str) -> pathlib.Path:
+    """Get path to the cached content of the page.
+
+    Args:
+        url (str): Full url of the page
+
+    Returns:
+        pathlib.Path: Path to the gzipped page content
+    """
+    return CACHE_DIR / f"{hashlib.sha1(url.encode()).hexdigest()}.html.gz"
+
+
+def readCache(url: str) -> Optional[str]:
+    """Get page content saved with writeCache.
+
+    Args:
+        url (str): Full url of the page
+
+    Returns:
+        Optional[str]: Page content or None if the page was not cached (or the cached file is damaged)
+    """
+    path = cachePath(url)
+    if not path.is_file():
+        return None
+    try:
+        return gzip.decompress(path.read_bytes()).decode()
+    except (OSError, EOFError, UnicodeDecodeError, zlib.error):
+        return None
+
+
+def writeCache(url: str, page_content: str) -> None:
+    """Save page content to the cache directory, so the page does not have to be downloaded again.
+
+    Args:
+        url (str): Full url of the page
+        page_content (str): Page content
+    """
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+    # Page is written under a temporary name first, so an interrupted write never leaves a truncated file
+    path = cachePath(url)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_bytes(gzip.compress(page_content.encode()))
+    os.replace(tmp_path, path)
+
+
+def isPlayerPage(page_content: str) -> bool:
+    """Check (without parsing) whether the page holds both player information and match table.
+
+    Args:
+        page_content (str): Html content of the player page
+
+    Returns:
+        bool: True if the page is complete
+    """
+    return all(sentinel in page_content for sentinel in PLAYER_PAGE_SENTINELS)
+
+
+def isTransientError(error: BaseException) -> bool:
+    """Check whether downloading the page may succeed if it is repeated.
+
+    Args:
+        error (BaseException): Exception raised while downloading the page
+
+    Returns:
+        bool: True for network errors, timeouts, rate limiting (429) and server errors (5xx)
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return isinstance(error, (httpx.TransportError, asyncio.TimeoutError))
+
+
+def retryWait(retry_state: RetryCallState) -> float:
+    """Get number of seconds to wait before next download attempt.
+
+    Args:
+        retry_state (RetryCallState): State of the retried call
+
+    Returns:
+        float: Value of Retry-After header (at most MAX_RETRY_AFTER) for rate limited requests, exponential backoff with jitter otherwise
+    """
+    error = retry_state.outcome.exception()
+    if isinstance(error, httpx.HTTPStatusError) and error.response.status_code == 429:
+        retry_after = error.response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), MAX_RETRY_AFTER)
+    return BACKOFF(retry_state)
+
+
+@retry(wait=retryWait, stop=stop_after_attempt(4), retry=retry_if_exception(isTransientError), reraise=True)
+async def fetchPage(client: httpx.AsyncClient, link: str) -> str:
+    """Get html content of a single whoscored page.
+
+    Args:
+        client (httpx.AsyncClient): Client shared by all requests
+        link (str): Link to the page relative to whoscored domain
+
+    Returns:
+        str: Page content
+    """
+    # Only complete pages are cached, so blocked or challenge pages are downloaded again next time
+    url = f"https://www.whoscored.com/{link.lstrip('/')}"
+    page_content = readCache(url)
+    if page_content is not None and isPlayerPage(page_content):
+        return page_content
+
+    response = await client.get(url)
+    response.raise_for_status()
+    page_content = response.text
+
+    if isPlayerPage(page_content):
+        writeCache(url, page_content)
+    return page_content
+
+
+async def scrapePlayers(links: List[str], pool: ProcessPoolExecutor, save: Callable[[Dict[str, List]], None], concurrency: int=10) -> List[str]:
+    """Download and parse player pages in a pipeline, so parsing of a page overlaps with waiting for the next ones.
+
+    Pages are downloaded concurrently and put to a queue, from which workers (one per CPU core) take them and parse them in the pool.
+
+    Args:
+        links (List[str]): Links to the player pages relative to whoscored domain
+        pool (ProcessPoolExecutor): Pool in which pages are parsed
+        save (Callable[[Dict[str, List]], None]): Function called with statistics of every parsed player (from parsePlayerPage)
+        concurrency (int, optional): Maximum number of requests in flight. Defaults to 10.
+
+    Returns:
+        List[str]: Links to the pages that could not be downloaded or came incomplete
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    queue = asyncio.Queue(maxsize=50)
+    failed = []
+
+    async def producer(client: httpx.AsyncClient, link: str):
+        # Semaphore is released only after the page is in the queue, so slow parsing also slows down downloading
+        async with semaphore:
+            try:
+                page_content = await fetchPage(client, link)
+            except Exception as e:
+                print(f"While downloading {link} exception occured: {e}")
+                page_content = None
+            await queue.put((link, page_content))
+
+    async def consumer():
+        while True:
+            link, page_content = await queue.get()
+            player_name = link.split("/")[-1].replace("-", " ")
+            try:
+                if page_content is None or not isPlayerPage(page_content):
+                    failed.append(link)
+                else:
+                    save(await loop.run_in_executor(pool, parsePlayerPage, page_content, player_name))
+            except Exception as e:
+                print(f"While procesing {player_name} exception occured: {e}")
+            finally:
+                queue.task_done()
+
+    # All pages share one host, so with HTTP/2 the requests are multiplexed over a single connection
+    limits = httpx.Limits(max_connections=20, max_keepalive_connections=20)
+    async with httpx.AsyncClient(http2=True, headers=HEADERS, limits=limits, timeout=15, follow_redirects=True) as client:
+        consumers = [asyncio.create_task(consumer()) for _ in range(os.cpu_count() or 1)]
+        await asyncio.gather(*[producer(client, link) for link in links])
+        await queue.join()
+        for task in consumers:
+            task.cancel()
+
+    return failed
+
+
+def parsePlayerPage(page_content: str, player_name: str) -> Dict[str, List]:
+    """Extract player statistics per game from the whoscored player page.
+
+    Args:
+        page_content (str): Html content of the player page
+        player_name (str): Name of the player
+
+    Returns:
+        Dict[str, List]: Columns of the dataset (one element per game)
+    """
+    tree = html.fromstring(page_content)
+
+    # Get player team and nationality
+    player_team = PLAYER_TEAM(tree)[0]
+    player_nationality = PLAYER_NATIONALITY(tree)[0]
+
+    # Get match dates, home and away team names, and match results
+    dates = MATCH_DATES(tree)
+    home_teams = HOME_TEAMS(tree)
+    away_teams = AWAY_TEAMS(tree)
+    results = MATCH_RESULTS(tree)
+
+    # Get number of minutes played by a player and player ratings for each game (None if missing)
+    minutes = [NOT_DIGIT.sub("", minut) for minut in MATCH_MINUTES(tree)]
+    minutes = [int(minut) if minut else None for minut in minutes]
+    ratings = [NOT_FLOAT.sub("", rating) for rating in MATCH_RATINGS(tree)]
+    ratings = [float(rating) if rating else None for rating in ratings]
+
+    # Count number of incidents for a player in each match
+    # Incidents involve yellow cards, red cards, man of the match awards, goals, and assists
+    counts = [Counter(INCIDENT_TITLES(incident)) for incident in MATCH_INCIDENTS(tree)]
+    yellow_cards = [count['Yellow Card'] for count in counts]
+    red_cards = [count['Red Card'] for count in counts]
+    man_of_the_match = [count['Man of the match'] for count in counts]
+    goals = [count['Goal'] for count in counts]
+    assists = [count['Assist'] for count in counts]
+
+    n = len(dates)
+    return {'Name': [player_name]*n,'Club': [player_team]*n,'Nationality':[player_nationality]*n,
+            'Date': dates,'Home': home_teams,'Away': away_teams,'Result': results,'Minutes': minutes,
+            'Ratings': ratings,'Yellow': yellow_cards,'Red': red_cards,'Goals': goals,'Assists': assists,'MOM': man_of_the_match}
+
+
+def writePart(data_path: str, table: pa.Table) -> None:
+    """Write table as a new part file of the parquet dataset, so rows written before are never rewritten.
+
+    Args:
+        data_path (str): Path to the dataset directory
+        table (pa.Table): Rows to be written
+    """
+    os.makedirs(data_path, exist_ok=True)
+    name = f"part-{time.time_ns()}.parquet"
+
+    # Files starting with a dot are ignored when the dataset is read, so a part appears only once it is complete
+    tmp_path = os.path.join(data_path, f".{name}.tmp")
+    pq.write_table(table, tmp_path, compression="snappy")
+    os.replace(tmp_path, os.path.join(data_path, name))
+
+
+def getParts(data_path: str) -> List[str]:
+    """Get completed part files of the parquet dataset (written with writePart).
+
+    Args:
+        data_path (str): Path to the dataset directory
+
+    Returns:
+        List[str]: Paths to the part files, empty if the dataset does not exist yet
+    """
+    return sorted(glob.glob(os.path.join(data_path, "part-*.parquet")))
+
+
+def getPlayersData(players_path: str="scraping/player_links.pickle", data_path: str="data/raw", batch_size: int=50, csv_path: str="data/raw.csv") -> None:
     """Get all player statistics per game from whoscored and save it to the data_path.
 
     Args:
         players_path (str, optional): Path to the list with player links (from getWhoScoredLinks). Defaults to "scraping/player_links.pickle".
-        data_path (str, optional): Path where results will be written to. Defaults to "data/raw.csv".
+        data_path (str, optional): Path where results will be written to (parquet dataset directory). Defaults to "data/raw".
+        batch_size (int, optional): Number of players written to the file at once. Defaults to 50.
+        csv_path (str, optional): Path to the dataset saved as csv by previous versions, imported if data_path has no parts yet. Defaults to "data/raw.csv".
     """
     # Load player links
     with open(players_path, "rb") as f:
         links = pickle.load(f)
     
-    links_flat = [link for club in links for link in club]
-    links_flat = list(set(links_flat))
+    # Flatten and remove duplicates, keeping the order of the links
+    links_flat = list(dict.fromkeys(link for club in links for link in club))
+
+    # Import dataset saved as csv once, so players in it are not scraped again
+    if not getParts(data_path) and os.path.isfile(csv_path):
+        text_columns = ['Name','Club','Nationality','Date','Home','Away','Result']
+        csv_data = pd.read_csv(csv_path, dtype={column: str for column in text_columns}).astype({"Minutes": "Int64"})
+        writePart(data_path, pa.Table.from_pandas(csv_data, schema=PLAYERS_SCHEMA, preserve_index=False))
+
+    # Load names of the players in the dataset
+    processed_names = set()
+    for part in getParts(data_path):
+        processed_names.update(pq.read_table(part, columns=["Name"]).column("Name").to_pylist())
+
+    # Process only players that are not in a dataset already (TODO: can be improved for continous flow)
+    links_flat = [link for link in links_flat if link.split("/")[-1].replace("-", " ") not in processed_names]
+
+    # Parse pages in separate processes, parsing is CPU bound and would otherwise run on a single core
+    with ProcessPoolExecutor() as pool:
+        # Rows are kept in memory and written as a new part for batch_size players at once
+        buffer = []
+        def flush():
+            if buffer:
+                writePart(data_path, pa.concat_tables(buffer))
+                buffer.clear()
+
+        def save(columns: Dict[str, List]):
+            buffer.append(pa.Table.from_pydict(columns, schema=PLAYERS_SCHEMA))
+            if len(buffer) >= batch_size:
+                flush()
 
-    # Load or create dataset
-    if os.path.isfile(data_path):
-        data = pd.read_csv(data_path)
-        processed_names = data.Name.unique()
-    else:
-        data = pd.DataFrame(columns=['Name','Club','Nationality','Date','Home','Away','Result','Minutes','Ratings','Yellow','Red','Goals','Assists','MOM'])
-        processed_names = []
-
-    for link in links_flat:
-
-        # Process only players that are not in a dataset already (TODO: can be improved for continous flow)
-        player_name = link.split("/")[-1].replace("-", " ")
-        if player_name in processed_names:
-            continue
-            
         try:
-            # Initialize webdriver and get content for a player
-            driver = webdriver.Chrome()
-            driver.get(f"https://www.whoscored.com/{link}")
-            page_content = driver.page_source
-            driver.quit()
-            
-            soup = BeautifulSoup(page_content, features="html.parser")
-            
-            # Get player team and nationality
-            player_info = soup.find("div", {"class": "col12-lg-10 col12-m-10 col12-s-9 col12-xs-8"})
-            player_team = player_info.find("a", {"class": "team-link"}).contents[0]
-            player_nationality = player_info.find("span", {"class": "iconize iconize-icon-left"}).contents[0]
-            
-            stat_table = soup.find("div", {"id": "player-matches-table"})
-
-            # Get match dates
-            dates = stat_table.find_all("div", {"class" : "col12-lg-1 col12-m-2 col12-s-0 col12-xs-0 divtable-data date-long"})
-            dates = [date.find("div").contents[0] for date in dates]
-
-            # Get Home team names
-            home_teams = stat_table.find_all("div", {"class" : "home-team"})
-            home_teams = [team.find("a").contents[0] for team in home_teams]
-
-            # Get away team names
-            away_teams = stat_table.find_all("div", {"class" : "away-team"})
-            away_teams = [team.find("a").contents[0] for team in away_teams]
-
-            # Get match result
-            results = stat_table.find_all("div", {"class" : "player-match-result"})
-            results = [result.find("a").contents[0] for result in results]
-
-            # Get number of minutes played by a player in each game
-            minutes = stat_table.find_all("div", {"title" : "Minutes played in this match"})
-            minutes = [re.sub("[^0-9]", "", minut.contents[0]) for minut in minutes]
-
-            # Get player ratings for each game
-            ratings = stat_table.find_all("div", {"title" : "Rating in this match"})
-            ratings = [re.sub("[^0-9\.]", "", rating.contents[0]) for rating in ratings]
-
-            # Count number of incidents for a player in each match
-            incidents = stat_table.find_all("div", {"class" : "col12-lg-3 col12-m-2 col12-s-3 col12-xs-3 divtable-data match-icons"})
-            incidents = [incident.find_all("span", {"class" : "incident-wrapper"}) for incident in incidents]
-
-            # Incidents involve yellow cards, red cards, man of the match awards, goals, and assists
-            yellow_cards = [0 if len(incident) == 0 else sum([1 if i.find("span").get("title") == 'Yellow Card' else 0 for i in incident]) for incident in incidents]
-            red_cards = [0 if len(incident) == 0 else sum([1 if i.find("span").get("title") == 'Red Card' else 0 for i in incident]) for incident in incidents]
-            man_of_the_match = [0 if len(incident) == 0 else sum([1 if i.find("span").get("title") == 'Man of the match' else 0 for i in incident]) for incident in incidents]
-            goals = [0 if len(incident) == 0 else sum([1 if i.find("span").get("title") == 'Goal' else 0 for i in incident]) for incident in incidents]
-            assists = [0 if len(incident) == 0 else sum([1 if i.find("span").get("title") == 'Assist' else 0 for i in incident]) for incident in incidents]
-
-            # Save data
-            n = len(dates)
-            temp = pd.DataFrame({'Name': [player_name]*n,'Club': [player_team]*n,'Nationality':[player_nationality]*n,
-                        'Date': dates,'Home': home_teams,'Away': away_teams,'Result': results,'Minutes': minutes,
-                        'Ratings': ratings,'Yellow': yellow_cards,'Red': red_cards,'Goals': goals,'Assists': assists,'MOM': man_of_the_match})
-            
-            data = pd.concat([data, temp])
-            data.to_csv(data_path, index=False)
-            processed_names = np.append(player_name, processed_names)
-
-        except Exception as e:
-            print(f"While procesing {player_name} exception occured: {e}")
+            # Download and parse all players at once (match table is rendered on the server, so no webdriver is needed)
+            failed = asyncio.run(scrapePlayers(links_flat, pool, save))
+
+            # Render with a webdriver only the pages that could not be downloaded or came incomplete
+            if failed:
+                with createDriver() as driver:
+                    for link in failed:
+                        player_name = link.split("/")[-1].replace("-", " ")
+                        try:
+                            url = f"https://www.whoscored.com/{link.lstrip('/')}"
+                            driver.get(url)
+                            page_content = driver.page_source
+
+                            # Skip parsing (and caching) of the pages that are still incomplete
+                            if not isPlayerPage(page_content):
+                                raise ValueError("player information or match table not found")
+                            writeCache(url, page_content)
+                            save(pool.submit(parsePlayerPage, page_content, player_name).result())
+
+                        except Exception as e:
+                            print(f"While procesing {player_name} exception occured: {e}")
+        finally:
+            # Players parsed since the last batch are saved also when scraping is interrupted
+            flush()
         
 
 def getPlayersPosition(links: List[str], path: str="data/positions.csv") -> None:
@@ -167,47 +498,51 @@ def getPlayersPosition(links: List[str], path: str="data/positions.csv") -> None
         path (str, optional): Path where results will be written to. Defaults to "data/positions.csv".
     """
 
-    # Load or create dataset
+    # Load or create dataset (new players are collected in a list and concatenated once at the end)
     if os.path.isfile(path):
-        data = pd.read_csv(path)
+        frames = [pd.read_csv(path)]
     else:
-        data = pd.DataFrame(columns=['Name', 'Position'])
+        frames = [pd.DataFrame(columns=['Name', 'Position'])]
         
-    for link in links:
-        try:
-            # Initialize webdriver and get content for a player
-            driver = webdriver.Chrome()
-            driver.get(f"https://www.uefa.com{link}squad/")
-            page_content = driver.page_source
-            driver.quit()
-
-            # Get tables with players on each position
-            soup = BeautifulSoup(page_content, features="html.parser")
-            all_players = soup.find("div", {"class": "pk-col pk-col--span-00-4 pk-col--span-ss-4 pk-col--span-xs-4 pk-col--span-sm-8 pk-col--span-md-12 pk-col--span-lg-12 squad--team-wrap"})
-            players_per_position = all_players.find_all("pk-table-body", {"class": "sc-pk-table sc-pk-table-body-h sc-pk-table-body-s pk-table--body hydrated"})
-
-            # Helper function to extract player names for each position
-            def getPosition(number: int, position: str):    
-                players = players_per_position[number].find_all("pk-table-row", {"class": "row--squadlist sc-pk-table sc-pk-table-body sc-pk-table-row-h sc-pk-table-row-s pk-table--row has-stroke hydrated"})
-                players = [player.find("span", {"itemprop": "name"}).contents[0].strip() for player in players]
-                players = [player for player in players if player[-1] != "*"]
-                return pd.DataFrame({'Name': players, 'Position': [position]*len(players)})
+    try:
+        with createDriver() as driver:
+            for link in links:
+                try:
+                    # Get content for a club squad
+                    driver.get(f"https://www.uefa.com{link}squad/")
+                    page_content = driver.page_source
+
+                    # Get tables with players on each position
+                    soup = BeautifulSoup(page_content, features="lxml", parse_only=SoupStrainer("div", {"class": SQUAD_TABLE}))
+                    all_players = soup.find("div", {"class": SQUAD_TABLE})
+                    players_per_position = all_players.find_all("pk-table-body", {"class": SQUAD_POSITION})
+
+                    # Helper function to extract player names for each position
+                    def getPosition(number: int, position: str):    
+                        players = players_per_position[number].find_all("pk-table-row", {"class": SQUAD_PLAYER})
+                        players = [player.find("span", {"itemprop": "name"}).contents[0].strip() for player in players]
+                        players = [player for player in players if player[-1] != "*"]
+                        return pd.DataFrame({'Name': players, 'Position': [position]*len(players)})
             
-            goalkeepers = getPosition(0, 'goalkeeper')
-            defenders = getPosition(1, 'defender')
-            midfilders = getPosition(2, 'midfielder')
-            forwards = getPosition(3, 'forward')
-
-            # Save data
-            data = pd.concat([data, goalkeepers, defenders, midfilders, forwards])
-            data.to_csv(path, index=False)
-
-        except Exception as e:
-            print(f"While procesing {link} exception occured: {e}")
-
-
-# names, links = getClubs()
-# getPlayersPosition(links)
-# names = ['Arsenal', 'Aston Villa', 'Atalanta', 'Atleti', 'B. Dortmund', 'Barcelona', 'Bayern München', 'Benfica', 'Bologna', 'Brest', 'Celtic', 'Club Brugge', 'Crvena Zvezda', 'Feyenoord', 'Girona', 'GNK Dinamo', 'Inter', 'Juventus', 'Leipzig', 'Leverkusen', 'Lille', 'Liverpool', 'Man City', 'Milan', 'Monaco', 'Paris', 'PSV', 'Real Madrid', 'S. Bratislava', 'Salzburg', 'Shakhtar', 'Sparta Praha', 'Sporting CP', 'Sturm Graz', 'Stuttgart', 'Young Boys']
-# getWhoScoredLinks(names)
-# getPlayersData()
+                    goalkeepers = getPosition(0, 'goalkeeper')
+                    defenders = getPosition(1, 'defender')
+                    midfilders = getPosition(2, 'midfielder')
+                    forwards = getPosition(3, 'forward')
+
+                    # Save data
+                    frames.extend([goalkeepers, defenders, midfilders, forwards])
+
+                except Exception as e:
+                    print(f"While procesing {link} exception occured: {e}")
+
+    finally:
+        pd.concat(frames, ignore_index=True).to_csv(path, index=False)
+
+# Calls are guarded, as worker processes of the ProcessPoolExecutor import this module again on spawn
+if __name__ == "__main__":
+    # names, links = getClubs()
+    # getPlayersPosition(links)
+    # names = ['Arsenal', 'Aston Villa', 'Atalanta', 'Atleti', 'B. Dortmund', 'Barcelona', 'Bayern München', 'Benfica', 'Bologna', 'Brest', 'Celtic', 'Club Brugge', 'Crvena Zvezda', 'Feyenoord', 'Girona', 'GNK Dinamo', 'Inter', 'Juventus', 'Leipzig', 'Leverkusen', 'Lille', 'Liverpool', 'Man City', 'Milan', 'Monaco', 'Paris', 'PSV', 'Real Madrid', 'S. Bratislava', 'Salzburg', 'Shakhtar', 'Sparta Praha', 'Sporting CP', 'Sturm Graz', 'Stuttgart', 'Young Boys']
+    # getWhoScoredLinks(names)
+    # getPlayersData()
+    pass